@@ -5,16 +5,33 @@ Injects best practice reminders on every prompt submission.
 Loads rules from .chainlink/rules/ markdown files.
 """
 
-import json
 import sys
 import os
-import io
-import subprocess
-import hashlib
-from datetime import datetime
 
-# Fix Windows encoding issues with Unicode characters
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+def drain_stdin():
+    """Read and discard stdin so the writer (Claude Code passes prompt info) never sees a broken pipe."""
+    try:
+        sys.stdin.buffer.read()
+    except (OSError, ValueError, AttributeError):
+        pass
+
+
+# Opt-out switch: CHAINLINK_GUARD=off emits nothing. Checked before the remaining
+# imports so a disabled guard costs little more than interpreter startup.
+if __name__ == "__main__" and os.environ.get('CHAINLINK_GUARD', '').strip().lower() == 'off':
+    drain_stdin()
+    sys.exit(0)
+
+import json  # noqa: E402
+import re  # noqa: E402
+import hashlib  # noqa: E402
+import heapq  # noqa: E402
+import time  # noqa: E402
+from datetime import datetime  # noqa: E402
+
+# Version field of an inline Cargo dependency table: { version = "x.y", ... }
+CARGO_VERSION_RE = re.compile(r'version\s*=\s*"([^"]+)"')
 
 
 def find_chainlink_dir():
@@ -84,11 +101,32 @@ def load_all_rules(chainlink_dir):
     for filename, lang_name in language_files:
         content = load_rule_file(rules_dir, filename)
         if content:
+            # Store the finished section; if the file doesn't start with a header, add one
+            if not content.startswith('#'):
+                content = f"### {lang_name} Best Practices\n{content}"
             language_rules[lang_name] = content
 
     return language_rules, global_rules, project_rules
 
 
+# Paths already found to be absent during this invocation
+MISSING_PATHS = set()
+
+
+def path_exists(path):
+    """os.path.exists with a negative cache so repeated probes of absent files skip the stat."""
+    if path in MISSING_PATHS:
+        return False
+    if os.path.exists(path):
+        return True
+    MISSING_PATHS.add(path)
+    return False
+
+
+# Directories whose listing fed into the reminder; their mtimes validate the cache
+SCANNED_DIRS = set()
+
+
 # Detect language from common file extensions in the working directory
 def detect_languages():
     """Scan for common source files to determine active languages."""
@@ -133,36 +171,52 @@ def detect_languages():
 
     # Check cwd and immediate subdirs for config files
     check_dirs = [cwd]
+    has_src = False
     try:
-        for entry in os.listdir(cwd):
-            subdir = os.path.join(cwd, entry)
-            if os.path.isdir(subdir) and not entry.startswith('.'):
-                check_dirs.append(subdir)
+        with os.scandir(cwd) as it:
+            for entry in it:
+                if not entry.name.startswith('.') and entry.is_dir():
+                    check_dirs.append(entry.path)
+                    has_src = has_src or entry.name == 'src'
     except (PermissionError, OSError):
         pass
 
+    SCANNED_DIRS.update(check_dirs)
     for check_dir in check_dirs:
         for config_file, lang in config_indicators.items():
-            if os.path.exists(os.path.join(check_dir, config_file)):
+            if path_exists(os.path.join(check_dir, config_file)):
                 found.add(lang)
 
     # Also scan for source files in src/ directories
+    # (cwd/src is known from the scan above)
     scan_dirs = [cwd]
-    src_dir = os.path.join(cwd, 'src')
-    if os.path.isdir(src_dir):
-        scan_dirs.append(src_dir)
+    if has_src:
+        scan_dirs.append(os.path.join(cwd, 'src'))
     # Check nested project src dirs too
-    for check_dir in check_dirs:
+    for check_dir in check_dirs[1:]:
         nested_src = os.path.join(check_dir, 'src')
         if os.path.isdir(nested_src):
             scan_dirs.append(nested_src)
 
+    all_languages = len(set(extensions.values()))
     for scan_dir in scan_dirs:
+        SCANNED_DIRS.add(scan_dir)
         try:
-            for entry in os.listdir(scan_dir):
-                ext = os.path.splitext(entry)[1].lower()
-                if ext in extensions:
-                    found.add(extensions[ext])
+            with os.scandir(scan_dir) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.startswith('.'):
+                        continue
+                    _, dot, ext = name.rpartition('.')
+                    if not dot:
+                        continue
+                    lang = extensions.get('.' + ext.lower())
+                    if lang is None or entry.is_dir():
+                        continue
+                    found.add(lang)
+                    if len(found) == all_languages:
+                        # Every known language already seen, nothing left to find
+                        return list(found)
         except (PermissionError, OSError):
             pass
 
@@ -171,29 +225,22 @@ def detect_languages():
 
 def get_language_section(languages, language_rules):
     """Build language-specific best practices section from loaded rules."""
-    sections = []
-    for lang in languages:
-        if lang in language_rules:
-            content = language_rules[lang]
-            # If the file doesn't start with a header, add one
-            if not content.startswith('#'):
-                sections.append(f"### {lang} Best Practices\n{content}")
-            else:
-                sections.append(content)
-
-    if not sections:
-        return ""
-
-    return "\n\n".join(sections)
+    return "\n\n".join(language_rules[lang] for lang in languages if lang in language_rules)
 
 
 # Directories to skip when building project tree
-SKIP_DIRS = {
+SKIP_DIRS = frozenset({
     '.git', 'node_modules', 'target', 'venv', '.venv', 'env', '.env',
     '__pycache__', '.chainlink', '.claude', 'dist', 'build', '.next',
     '.nuxt', 'vendor', '.idea', '.vscode', 'coverage', '.pytest_cache',
-    '.mypy_cache', '.tox', 'eggs', '*.egg-info', '.sass-cache'
-}
+    '.mypy_cache', '.tox', 'eggs', '.sass-cache'
+})
+
+# Directory name suffixes to skip (glob-style entries never match a set lookup)
+SKIP_DIR_SUFFIXES = ('.egg-info',)
+
+# Hidden directories that are still shown in the tree
+SHOWN_DOT_DIRS = ('.github', '.claude')
 
 
 def get_project_tree(max_depth=3, max_entries=50):
@@ -202,40 +249,55 @@ def get_project_tree(max_depth=3, max_entries=50):
     entries = []
 
     def should_skip(name):
-        if name.startswith('.') and name not in ('.github', '.claude'):
-            return True
-        return name in SKIP_DIRS or name.endswith('.egg-info')
-
-    def walk_dir(path, prefix="", depth=0):
-        if depth > max_depth or len(entries) >= max_entries:
-            return
-
+        return name in SKIP_DIRS or name.endswith(SKIP_DIR_SUFFIXES)
+
+    # Iterative depth-first walk; each stack item carries the "name/" line to emit
+    # when it is visited so the output keeps the same pre-order layout. Kinds come
+    # from DirEntry (no extra stat per entry); symlinks are followed only to
+    # classify them, and symlinked directories are listed but never descended.
+    stack = [(cwd, "", 0, None, True)]
+    while stack and len(entries) < max_entries:
+        path, prefix, depth, label, descend = stack.pop()
+        if label is not None:
+            entries.append(label)
+        if depth > max_depth or not descend:
+            continue
+
+        SCANNED_DIRS.add(path)
+        dirs = []
+        files = []
         try:
-            items = sorted(os.listdir(path))
+            with os.scandir(path) as it:
+                for item in it:
+                    name = item.name
+                    # Hidden entries are dropped before they are classified or staged
+                    if name.startswith('.') and name not in SHOWN_DOT_DIRS:
+                        continue
+                    try:
+                        if item.is_dir():
+                            if not should_skip(name):
+                                dirs.append((name, item.is_symlink()))
+                        elif item.is_file():
+                            # Regular files and links to them; not FIFOs or broken links
+                            if not name.startswith('.'):
+                                files.append(name)
+                    except OSError:
+                        continue
         except (PermissionError, OSError):
-            return
+            continue
 
-        # Separate dirs and files
-        dirs = [i for i in items if os.path.isdir(os.path.join(path, i)) and not should_skip(i)]
-        files = [i for i in items if os.path.isfile(os.path.join(path, i)) and not i.startswith('.')]
-
-        # Add files first (limit per directory)
-        for f in files[:10]:  # Max 10 files per dir shown
+        # Add files first (max 10 per dir shown; no need to sort the rest)
+        for f in heapq.nsmallest(10, files):
             if len(entries) >= max_entries:
-                return
+                break
             entries.append(f"{prefix}{f}")
+        else:
+            if len(files) > 10:
+                entries.append(f"{prefix}... ({len(files) - 10} more files)")
 
-        if len(files) > 10:
-            entries.append(f"{prefix}... ({len(files) - 10} more files)")
-
-        # Then recurse into directories
-        for d in dirs:
-            if len(entries) >= max_entries:
-                return
-            entries.append(f"{prefix}{d}/")
-            walk_dir(os.path.join(path, d), prefix + "  ", depth + 1)
-
-    walk_dir(cwd)
+        # Then descend into directories, pushed in reverse so they pop in order
+        for d, is_link in sorted(dirs, reverse=True):
+            stack.append((os.path.join(path, d), prefix + "  ", depth + 1, f"{prefix}{d}/", not is_link))
 
     if not entries:
         return ""
@@ -246,21 +308,151 @@ def get_project_tree(max_depth=3, max_entries=50):
     return "\n".join(entries)
 
 
-# Cache directory for dependency snapshots
-CACHE_DIR = os.path.join(os.getcwd(), '.chainlink', '.cache')
-
-
 def get_lock_file_hash(lock_path):
     """Get a hash of the lock file for cache invalidation."""
     try:
         mtime = os.path.getmtime(lock_path)
-        return hashlib.md5(f"{lock_path}:{mtime}".encode()).hexdigest()[:12]
+        return hashlib.blake2b(f"{lock_path}:{mtime}".encode(), digest_size=6).hexdigest()
     except OSError:
         return None
 
 
+# Files whose changes invalidate the cached reminder
+CACHE_WATCH_FILES = ('Cargo.toml', 'package.json', 'requirements.txt', 'go.mod')
+
+# Max age of a cached reminder. Override with CHAINLINK_GUARD_CACHE_TTL
+# (seconds, 0 disables the cache).
+CACHE_TTL_SECONDS = 300
+
+# Directories modified this close to the start of a scan may have changed
+# mid-scan (or within coarse mtime granularity), so the result isn't cached
+CACHE_RACY_WINDOW_NS = 2 * 10**9
+
+
+def get_cache_ttl():
+    """Return the reminder cache TTL in seconds from the environment, or the default."""
+    value = os.environ.get('CHAINLINK_GUARD_CACHE_TTL')
+    if value is None:
+        return CACHE_TTL_SECONDS
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return CACHE_TTL_SECONDS
+
+
+def get_reminder_cache_path(chainlink_dir):
+    """Return the cache file for the current project state, or None if caching is unavailable."""
+    if not chainlink_dir or get_cache_ttl() <= 0:
+        return None
+    cwd = os.getcwd()
+    parts = [cwd, str(datetime.now().year)]
+
+    # Manifest contents feed the dependency section; directory listings are
+    # validated separately against the mtimes stored with the entry
+    for name in CACHE_WATCH_FILES:
+        try:
+            parts.append(str(os.stat(os.path.join(cwd, name)).st_mtime_ns))
+        except OSError:
+            parts.append('-')
+
+    # Rule files are part of the output too
+    rules_dir = os.path.join(chainlink_dir, 'rules')
+    try:
+        with os.scandir(rules_dir) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                parts.append(f"{entry.name}:{entry.stat().st_mtime_ns}")
+    except OSError:
+        pass
+
+    # Entries are named reminder-<cwd>-<state> so cleanup only touches this cwd
+    # (fsencode: paths that aren't valid UTF-8 arrive as surrogate escapes)
+    cwd_key = hashlib.blake2b(os.fsencode(cwd), digest_size=6).hexdigest()
+    key = hashlib.blake2b(os.fsencode("|".join(parts)), digest_size=12).hexdigest()
+    return os.path.join(chainlink_dir, '.cache', f"reminder-{cwd_key}-{key}.txt")
+
+
+def read_cached_reminder(cache_path):
+    """Return the cached reminder as UTF-8 bytes if present and still valid, else None."""
+    if not cache_path:
+        return None
+    try:
+        if time.time() - os.path.getmtime(cache_path) > get_cache_ttl():
+            return None
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    # First line holds the mtimes of every directory the scans read
+    header, sep, reminder = data.partition(b'\n')
+    if not sep:
+        return None
+    try:
+        dir_mtimes = json.loads(header.decode('utf-8'))
+    except ValueError:
+        return None
+    if not isinstance(dir_mtimes, dict):
+        return None
+    for path, mtime in dir_mtimes.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return None
+        except OSError:
+            return None
+    return reminder
+
+
+def write_cached_reminder(cache_path, reminder, scanned_dirs, started_ns):
+    """Atomically store the reminder (UTF-8 bytes) with its directory mtimes and drop stale entries."""
+    if not cache_path:
+        return
+
+    dir_mtimes = {}
+    for path in scanned_dirs:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        if mtime >= started_ns - CACHE_RACY_WINDOW_NS:
+            return
+        dir_mtimes[path] = mtime
+
+    cache_dir = os.path.dirname(cache_path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(json.dumps(dir_mtimes).encode('utf-8'))
+            f.write(b'\n')
+            f.write(reminder)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return
+
+    # Drop older entries for this cwd; other cwds sharing the .chainlink dir keep theirs
+    current = os.path.basename(cache_path)
+    prefix = current.rsplit('-', 1)[0] + '-'
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                name = entry.name
+                if name != current and name.startswith(prefix) and name.endswith('.txt'):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+    except OSError:
+        pass
+
+
 def run_command(cmd, timeout=5):
     """Run a command and return output, or None on failure."""
+    # Imported here: subprocess is slow to import and the prompt path never needs it
+    import subprocess
     try:
         result = subprocess.run(
             cmd,
@@ -276,6 +468,84 @@ def run_command(cmd, timeout=5):
     return None
 
 
+# Upper bound on how much of a dependency manifest is read
+MAX_MANIFEST_BYTES = 1024 * 1024
+
+
+def read_manifest(path, limit=MAX_MANIFEST_BYTES, line_based=True):
+    """Read up to limit bytes of a manifest with raw os.read calls; return None if absent or unreadable."""
+    # Manifests are small and split into lines afterwards, so skip the buffered text-mode stack.
+    # A read cut short by the limit keeps only complete lines, or returns None for formats
+    # (line_based=False) that can't be parsed from a prefix.
+    if path in MISSING_PATHS:
+        return None
+    try:
+        # O_BINARY keeps Windows from opening the descriptor in text mode
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    except (FileNotFoundError, NotADirectoryError):
+        MISSING_PATHS.add(path)
+        return None
+    except OSError:
+        return None
+
+    chunks = []
+    truncated = False
+    try:
+        remaining = limit
+        while remaining > 0:
+            chunk = os.read(fd, remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        else:
+            # Limit reached: only truncated if there is more to read
+            truncated = bool(os.read(fd, 1))
+    except IsADirectoryError:
+        MISSING_PATHS.add(path)
+        return None
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    data = b"".join(chunks)
+    if truncated:
+        if not line_based:
+            return None
+        # The cut can fall mid-line (or mid-character); never hand callers a partial last line
+        data = data.rpartition(b'\n')[0]
+    return data.decode('utf-8', errors='replace')
+
+
+def parse_cargo_dependencies(content, max_deps):
+    """Line-based [dependencies] parser, used when no TOML parser is available."""
+    deps = []
+    in_deps = False
+    for line in content.splitlines():
+        # Strip once per line and reuse it for every prefix check
+        stripped = line.strip()
+        if stripped.startswith('['):
+            if in_deps:
+                break
+            in_deps = stripped.startswith('[dependencies]')
+            continue
+        if in_deps and '=' in stripped and stripped[0] != '#':
+            name, _, rest = stripped.partition('=')
+            name = name.strip()
+            rest = rest.strip()
+            if rest.startswith('{'):
+                # Handle { version = "x.y", features = [...] } format
+                match = CARGO_VERSION_RE.search(rest)
+                if match:
+                    deps.append(f"  {name} = \"{match.group(1)}\"")
+            elif rest.startswith(('"', "'")):
+                version = rest.strip('"').strip("'")
+                deps.append(f"  {name} = \"{version}\"")
+            if len(deps) >= max_deps:
+                break
+    return deps
+
+
 def get_dependencies(max_deps=30):
     """Get installed dependencies with versions. Uses caching based on lock file mtime."""
     cwd = os.getcwd()
@@ -283,130 +553,98 @@ def get_dependencies(max_deps=30):
 
     # Check for Rust (Cargo.toml)
     cargo_toml = os.path.join(cwd, 'Cargo.toml')
-    if os.path.exists(cargo_toml):
+    content = read_manifest(cargo_toml, line_based=False)
+    if content is not None:
+        # Imported only here: most runs hit the cache or have no Cargo.toml
+        try:
+            import tomllib
+        except ImportError:
+            # Python < 3.11: use the tomli backport if installed, else the line parser
+            try:
+                import tomli as tomllib
+            except ImportError:
+                tomllib = None
+
         # Parse Cargo.toml for direct dependencies (faster than cargo tree)
         try:
-            with open(cargo_toml, 'r') as f:
-                content = f.read()
-                in_deps = False
-                for line in content.split('\n'):
-                    if line.strip().startswith('[dependencies]'):
-                        in_deps = True
-                        continue
-                    if line.strip().startswith('[') and in_deps:
-                        break
-                    if in_deps and '=' in line and not line.strip().startswith('#'):
-                        parts = line.split('=', 1)
-                        name = parts[0].strip()
-                        rest = parts[1].strip() if len(parts) > 1 else ''
-                        if rest.startswith('{'):
-                            # Handle { version = "x.y", features = [...] } format
-                            import re
-                            match = re.search(r'version\s*=\s*"([^"]+)"', rest)
-                            if match:
-                                deps.append(f"  {name} = \"{match.group(1)}\"")
-                        elif rest.startswith('"') or rest.startswith("'"):
-                            version = rest.strip('"').strip("'")
-                            deps.append(f"  {name} = \"{version}\"")
+            if tomllib is not None:
+                cargo = tomllib.loads(content)
+                for name, spec in cargo.get('dependencies', {}).items():
+                    # Either "x.y" or { version = "x.y", features = [...] }
+                    version = spec.get('version') if isinstance(spec, dict) else spec
+                    if isinstance(version, str):
+                        deps.append(f"  {name} = \"{version}\"")
                         if len(deps) >= max_deps:
                             break
-        except (OSError, Exception):
+            else:
+                deps = parse_cargo_dependencies(content, max_deps)
+        except Exception:
             pass
         if deps:
             return "Rust (Cargo.toml):\n" + "\n".join(deps[:max_deps])
 
     # Check for Node.js (package.json)
     package_json = os.path.join(cwd, 'package.json')
-    if os.path.exists(package_json):
+    content = read_manifest(package_json, line_based=False)
+    if content is not None:
         try:
-            with open(package_json, 'r') as f:
-                pkg = json.load(f)
-                for dep_type in ['dependencies', 'devDependencies']:
-                    if dep_type in pkg:
-                        for name, version in list(pkg[dep_type].items())[:max_deps]:
-                            deps.append(f"  {name}: {version}")
-                            if len(deps) >= max_deps:
-                                break
-        except (OSError, json.JSONDecodeError, Exception):
+            pkg = json.loads(content)
+            for dep_type in ['dependencies', 'devDependencies']:
+                if dep_type in pkg:
+                    for name, version in list(pkg[dep_type].items())[:max_deps]:
+                        deps.append(f"  {name}: {version}")
+                        if len(deps) >= max_deps:
+                            break
+        except (json.JSONDecodeError, Exception):
             pass
         if deps:
             return "Node.js (package.json):\n" + "\n".join(deps[:max_deps])
 
     # Check for Python (requirements.txt or pyproject.toml)
     requirements = os.path.join(cwd, 'requirements.txt')
-    if os.path.exists(requirements):
-        try:
-            with open(requirements, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and not line.startswith('-'):
-                        deps.append(f"  {line}")
-                        if len(deps) >= max_deps:
-                            break
-        except (OSError, Exception):
-            pass
+    # Bounded read: only the first max_deps requirements are kept anyway
+    content = read_manifest(requirements, limit=65536)
+    if content is not None:
+        stripped = (line.strip() for line in content.splitlines())
+        deps = [f"  {line}" for line in stripped if line and line[0] not in '#-'][:max_deps]
         if deps:
             return "Python (requirements.txt):\n" + "\n".join(deps[:max_deps])
 
     # Check for Go (go.mod)
     go_mod = os.path.join(cwd, 'go.mod')
-    if os.path.exists(go_mod):
-        try:
-            with open(go_mod, 'r') as f:
-                in_require = False
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('require ('):
-                        in_require = True
-                        continue
-                    if line == ')' and in_require:
-                        break
-                    if in_require and line:
-                        deps.append(f"  {line}")
-                        if len(deps) >= max_deps:
-                            break
-        except (OSError, Exception):
-            pass
+    content = read_manifest(go_mod)
+    if content is not None:
+        in_require = False
+        for line in content.splitlines():
+            line = line.strip()
+            if line.startswith('require ('):
+                in_require = True
+                continue
+            if line == ')' and in_require:
+                break
+            if in_require and line:
+                deps.append(f"  {line}")
+                if len(deps) >= max_deps:
+                    break
         if deps:
             return "Go (go.mod):\n" + "\n".join(deps[:max_deps])
 
     return ""
 
 
-def build_reminder(languages, project_tree, dependencies, language_rules, global_rules, project_rules):
-    """Build the full reminder context."""
-    lang_section = get_language_section(languages, language_rules)
-    lang_list = ", ".join(languages) if languages else "this project"
-    current_year = datetime.now().year
-
-    # Build tree section if available
-    tree_section = ""
-    if project_tree:
-        tree_section = f"""
-### Project Structure (use these exact paths)
+# Reminder templates, filled in with str.format_map by build_reminder
+TREE_SECTION_TEMPLATE = """### Project Structure (use these exact paths)
 ```
 {project_tree}
-```
-"""
+```"""
 
-    # Build dependencies section if available
-    deps_section = ""
-    if dependencies:
-        deps_section = f"""
-### Installed Dependencies (use these exact versions)
+DEPS_SECTION_TEMPLATE = """### Installed Dependencies (use these exact versions)
 ```
 {dependencies}
-```
-"""
+```"""
 
-    # Build global rules section (from .chainlink/rules/global.md)
-    global_section = ""
-    if global_rules:
-        global_section = f"\n{global_rules}\n"
-    else:
-        # Fallback to hardcoded defaults if no rules file
-        global_section = f"""
-### Pre-Coding Grounding (PREVENT HALLUCINATIONS)
+# Fallback global rules used when .chainlink/rules/global.md is missing
+DEFAULT_GLOBAL_SECTION_TEMPLATE = """### Pre-Coding Grounding (PREVENT HALLUCINATIONS)
 Before writing code that uses external libraries, APIs, or unfamiliar patterns:
 1. **VERIFY IT EXISTS**: Use WebSearch to confirm the crate/package/module exists and check its actual API
 2. **CHECK THE DOCS**: Fetch documentation to see real function signatures, not imagined ones
@@ -463,39 +701,75 @@ If the conversation is getting long OR the task requires many more steps:
 2. Add detailed notes as a comment: `chainlink comment <id> "<what's done, what's next>"`
 3. Inform the user: "This task will require additional turns. I've created issue #X to track progress."
 
-Use `chainlink session work <id>` to mark what you're working on.
-"""
-
-    # Build project rules section (from .chainlink/rules/project.md)
-    project_section = ""
-    if project_rules:
-        project_section = f"\n### Project-Specific Rules\n{project_rules}\n"
+Use `chainlink session work <id>` to mark what you're working on."""
 
-    reminder = f"""<chainlink-behavioral-guard>
+REMINDER_TEMPLATE = """<chainlink-behavioral-guard>
 ## Code Quality Requirements
 
 You are working on a {lang_list} project. Follow these requirements strictly:
-{tree_section}{deps_section}{global_section}{lang_section}{project_section}
+
+{sections}
 </chainlink-behavioral-guard>"""
 
-    return reminder
+
+def build_reminder(languages, project_tree, dependencies, language_rules, global_rules, project_rules):
+    """Build the full reminder context."""
+    lang_list = ", ".join(languages) if languages else "this project"
+    sections = []
+
+    # Project structure and dependencies, when available
+    if project_tree:
+        sections.append(TREE_SECTION_TEMPLATE.format_map({'project_tree': project_tree}))
+    if dependencies:
+        sections.append(DEPS_SECTION_TEMPLATE.format_map({'dependencies': dependencies}))
+
+    # Global rules (from .chainlink/rules/global.md), falling back to hardcoded defaults
+    if global_rules:
+        sections.append(global_rules)
+    else:
+        sections.append(DEFAULT_GLOBAL_SECTION_TEMPLATE.format_map({'current_year': datetime.now().year}))
+
+    lang_section = get_language_section(languages, language_rules)
+    if lang_section:
+        sections.append(lang_section)
+
+    # Project rules (from .chainlink/rules/project.md)
+    if project_rules:
+        sections.append(f"### Project-Specific Rules\n{project_rules}")
+
+    # Only non-empty sections are emitted, each separated by one blank line
+    return REMINDER_TEMPLATE.format_map({
+        'lang_list': lang_list,
+        'sections': "\n\n".join(sections),
+    })
+
+
+def write_output(data):
+    """Write UTF-8 encoded output straight to the stdout buffer, bypassing text-mode encoding."""
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.write(b'\n')
+    sys.stdout.buffer.flush()
 
 
 def main():
-    try:
-        # Read input from stdin (Claude Code passes prompt info)
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        # If no valid JSON, still inject reminder
-        pass
-    except Exception:
-        pass
+    # The hook payload isn't used, so it is drained without decoding it
+    drain_stdin()
 
-    # Find chainlink directory and load rules
+    # Find chainlink directory; reuse the last reminder if nothing relevant changed
     chainlink_dir = find_chainlink_dir()
+    cache_path = get_reminder_cache_path(chainlink_dir)
+    cached = read_cached_reminder(cache_path)
+    if cached is not None:
+        write_output(cached)
+        sys.exit(0)
+
+    started_ns = int(time.time() * 10**9)
+
+    # Load rules
     language_rules, global_rules, project_rules = load_all_rules(chainlink_dir)
 
-    # Detect languages in the project
+    # Detect languages in the project (runs first so get_dependencies can
+    # reuse its MISSING_PATHS probes)
     languages = detect_languages()
 
     # Generate project tree to prevent path hallucinations
@@ -504,8 +778,13 @@ def main():
     # Get installed dependencies to prevent version hallucinations
     dependencies = get_dependencies()
 
+    reminder = build_reminder(languages, project_tree, dependencies, language_rules, global_rules, project_rules)
+    # surrogateescape: file names that aren't valid UTF-8 are written back as their original bytes
+    reminder = reminder.encode('utf-8', 'surrogateescape')
+    write_cached_reminder(cache_path, reminder, SCANNED_DIRS, started_ns)
+
     # Output the reminder as plain text (gets injected as context)
-    print(build_reminder(languages, project_tree, dependencies, language_rules, global_rules, project_rules))
+    write_output(reminder)
     sys.exit(0)
 
 